@@ -1,18 +1,23 @@
+import heapq
 import os
 import re
-import uuid
+import secrets
+from collections import deque
 from collections.abc import Mapping
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
+from email.utils import parsedate_to_datetime
+from functools import lru_cache
 from html import unescape
 from io import BytesIO
-from typing import Dict, List, Tuple
+from typing import Dict, List, Optional, Tuple
 from urllib.parse import urlparse
 
 import pandas as pd
 import requests
 import streamlit as st
 from dotenv import load_dotenv
-from streamlit_autorefresh import st_autorefresh
+from requests.adapters import HTTPAdapter, Retry
 
 
 st.set_page_config(
@@ -23,6 +28,7 @@ st.set_page_config(
 
 
 NEGATIVE_KEYWORDS = ["논란", "소송", "구설", "불매", "갑질", "사과문"]
+_NEG_RE = re.compile("|".join(map(re.escape, NEGATIVE_KEYWORDS)))
 PRESS_NAME_MAP = {
     "yna": "연합뉴스",
     "yonhap": "연합뉴스",
@@ -36,6 +42,24 @@ PRESS_NAME_MAP = {
     "asiae": "아시아경제",
 }
 
+# 겹치는 위치까지 모든 별칭 후보를 찾은 뒤, 기존 루프처럼 PRESS_NAME_MAP 순서가 앞선 키를 우선
+_PRESS_RE = re.compile("(?=(" + "|".join(map(re.escape, PRESS_NAME_MAP)) + "))")
+_PRESS_ORDER = {key: idx for idx, key in enumerate(PRESS_NAME_MAP)}
+_TAG_RE = re.compile(r"<[^>]+>")
+_HANGUL_RE = re.compile(r"[가-힣]")
+
+# 네이버 API 호출 간 TCP/TLS 연결 재사용
+_SESSION = requests.Session()
+_SESSION.mount(
+    "https://",
+    # 연결 실패만 재시도 (read 타임아웃까지 재시도하면 timeout=10 기준 최대 30초 가까이 멈출 수 있음)
+    HTTPAdapter(
+        pool_connections=8,
+        pool_maxsize=16,
+        max_retries=Retry(total=2, read=0, backoff_factor=0.3),
+    ),
+)
+
 
 def parse_dt(value: str) -> datetime:
     return datetime.strptime(value, "%Y-%m-%d %H:%M")
@@ -52,10 +76,17 @@ def make_article(
     link: str,
     summary: str,
     query_keyword: str,
+    collected_at: Optional[datetime] = None,
 ) -> Dict:
-    hit_keywords = [kw for kw in NEGATIVE_KEYWORDS if kw in title or kw in summary]
+    # 제목/요약을 한 번에 스캔하고, 등장 순서를 유지하며 중복 제거
+    # (대부분의 기사는 부정 키워드가 없으므로 search로 먼저 걸러 findall 생략)
+    combined = f"{title}\n{summary}"
+    if _NEG_RE.search(combined):
+        hit_keywords = list(dict.fromkeys(_NEG_RE.findall(combined)))
+    else:
+        hit_keywords = []
     return {
-        "id": str(uuid.uuid4())[:8],
+        "id": secrets.token_hex(4),
         "title": title,
         "press": press,
         "published_at": published_at,
@@ -64,7 +95,7 @@ def make_article(
         "query_keyword": query_keyword,
         "is_negative": len(hit_keywords) > 0,
         "negative_hits": ", ".join(hit_keywords) if hit_keywords else "",
-        "collected_at": datetime.now(),
+        "collected_at": collected_at if collected_at is not None else datetime.now(),
     }
 
 
@@ -147,11 +178,25 @@ def init_state() -> None:
         st.session_state.folders = ["보도자료", "기획기사", "위기관리", "경쟁사 동향"]
 
     if "inbox_articles" not in st.session_state:
-        st.session_state.inbox_articles = []
+        st.session_state.inbox_articles = deque()
+
+    if "inbox_link_set" not in st.session_state:
+        st.session_state.inbox_link_set = {a["link"] for a in st.session_state.inbox_articles}
+
+    if "inbox_version" not in st.session_state:
+        st.session_state.inbox_version = 0
+
+    if "alerts_version" not in st.session_state:
+        st.session_state.alerts_version = -1
 
     if "saved_articles" not in st.session_state:
         st.session_state.saved_articles = []
 
+    if "saved_articles_by_id" not in st.session_state:
+        st.session_state.saved_articles_by_id = {
+            s["saved_id"]: s for s in st.session_state.saved_articles
+        }
+
     if "correction_items" not in st.session_state:
         st.session_state.correction_items = []
 
@@ -164,15 +209,27 @@ def init_state() -> None:
     if "last_auto_collect_at" not in st.session_state:
         st.session_state.last_auto_collect_at = datetime.now()
 
+    if "last_purge_at" not in st.session_state:
+        st.session_state.last_purge_at = datetime.min
+
 
 def purge_old_inbox(days: int = 7) -> None:
     threshold = datetime.now() - timedelta(days=days)
-    st.session_state.inbox_articles = [
-        a for a in st.session_state.inbox_articles if a["collected_at"] >= threshold
-    ]
+    inbox = st.session_state.inbox_articles
+    removed = 0
+    # 새 기사는 왼쪽에 추가되므로 오른쪽 끝이 가장 오래 전에 수집된 기사
+    while inbox and inbox[-1]["collected_at"] < threshold:
+        st.session_state.inbox_link_set.discard(inbox.pop()["link"])
+        removed += 1
+    if removed:
+        st.session_state.inbox_version += 1
 
 
 def refresh_alerts() -> None:
+    # 임시 보관함이 바뀌지 않았다면 기존 알림 목록을 그대로 사용
+    if st.session_state.alerts_version == st.session_state.inbox_version:
+        return
+
     items = []
     for article in st.session_state.inbox_articles:
         if article["is_negative"]:
@@ -183,12 +240,15 @@ def refresh_alerts() -> None:
                 }
             )
     st.session_state.alerts = sorted(items, key=lambda x: x["time"], reverse=True)
+    st.session_state.alerts_version = st.session_state.inbox_version
 
 
 def _clean_secret_value(value: str) -> str:
     return str(value).strip().strip('"').strip("'")
 
 
+# .env / Secrets 파싱은 프로세스당 한 번만 수행 (상태 점검 버튼에서 재로딩)
+@st.cache_resource(show_spinner=False)
 def get_naver_credentials() -> Tuple[str, str]:
     load_dotenv()
 
@@ -250,23 +310,22 @@ def get_naver_credentials() -> Tuple[str, str]:
 
 
 def naver_api_ready() -> bool:
-    client_id, client_secret = get_naver_credentials()
-    return bool(client_id and client_secret)
+    return all(get_naver_credentials())
 
 
 def clean_html(text: str) -> str:
-    no_tags = re.sub(r"<[^>]+>", "", text or "")
-    return unescape(no_tags).strip()
+    return unescape(_TAG_RE.sub("", text or "")).strip()
 
 
 def parse_naver_pub_date(value: str) -> datetime:
     # 예: "Thu, 26 Feb 2026 09:30:00 +0900"
     try:
-        return datetime.strptime(value, "%a, %d %b %Y %H:%M:%S %z").replace(tzinfo=None)
-    except ValueError:
+        return parsedate_to_datetime(value).replace(tzinfo=None)
+    except (TypeError, ValueError):
         return datetime.now()
 
 
+@lru_cache(maxsize=2048)
 def guess_press_from_link(link: str) -> str:
     try:
         host = urlparse(link).netloc.lower().replace("www.", "")
@@ -280,90 +339,134 @@ def guess_press_from_link(link: str) -> str:
         return "언론사 미상"
 
 
+def _match_press_alias(value: str) -> str:
+    hits = _PRESS_RE.findall(value.lower().replace(" ", ""))
+    if not hits:
+        return ""
+    return PRESS_NAME_MAP[min(hits, key=_PRESS_ORDER.__getitem__)]
+
+
+@lru_cache(maxsize=4096)
 def normalize_press_name(raw_press: str, link: str) -> str:
     value = (raw_press or "").strip()
-    if value and re.search(r"[가-힣]", value):
+    if value and _HANGUL_RE.search(value):
         return value
 
-    lower_value = value.lower().replace(" ", "")
-    for key, ko_name in PRESS_NAME_MAP.items():
-        if key in lower_value:
-            return ko_name
+    matched = _match_press_alias(value)
+    if matched:
+        return matched
 
     host_guess = guess_press_from_link(link)
-    lower_host_guess = host_guess.lower().replace(" ", "")
-    for key, ko_name in PRESS_NAME_MAP.items():
-        if key in lower_host_guess:
-            return ko_name
+    matched = _match_press_alias(host_guess)
+    if matched:
+        return matched
 
     if value:
         return value
     return host_guess
 
 
-def collect_news_from_naver() -> Tuple[int, str]:
-    client_id, client_secret = get_naver_credentials()
-
-    if not (client_id and client_secret):
-        return 0, "no_key"
-
+def _request_naver(
+    keyword: str,
+    client_id: str,
+    client_secret: str,
+    sort: str = "date",
+    display: int = 20,
+) -> List[Dict]:
     endpoint = "https://openapi.naver.com/v1/search/news.json"
     headers = {
         "X-Naver-Client-Id": client_id,
         "X-Naver-Client-Secret": client_secret,
     }
+    params = {
+        "query": keyword,
+        "display": display,
+        "start": 1,
+        "sort": sort,
+    }
+    response = _SESSION.get(endpoint, headers=headers, params=params, timeout=10)
+    response.raise_for_status()
+    payload = response.json()
+    return payload.get("items", [])
+
+
+# 자동 수집 주기(1시간)보다 훨씬 짧게 캐시해 같은 키로 거의 동시에 들어온 세션 간 중복 호출만 흡수
+# (client_id는 캐시 키에 포함하고, secret만 `_` 접두어로 해시 대상에서 제외)
+@st.cache_data(ttl=300, show_spinner=False, max_entries=128)
+def _fetch_naver(
+    keyword: str,
+    client_id: str,
+    _client_secret: str,
+    sort: str = "date",
+    display: int = 20,
+) -> List[Dict]:
+    return _request_naver(keyword, client_id, _client_secret, sort=sort, display=display)
+
+
+def collect_news_from_naver(use_cache: bool = True) -> Tuple[int, str]:
+    client_id, client_secret = get_naver_credentials()
+
+    if not (client_id and client_secret):
+        return 0, "no_key"
+
     keywords = st.session_state.keywords or ["삼성화재"]
-    existing_links = {a["link"] for a in st.session_state.inbox_articles}
+    existing_links = st.session_state.inbox_link_set
     added = 0
+    batch_now = datetime.now()
+    fetch = _fetch_naver if use_cache else _request_naver
+
+    # 키워드별 호출은 서로 독립적이므로 동시에 요청하고, 병합은 키워드 순서대로 단일 스레드에서 처리
+    # 일부 키워드가 실패해도 성공한 키워드의 기사는 반영
+    with ThreadPoolExecutor(max_workers=min(8, len(keywords))) as pool:
+        futures = [
+            (keyword, pool.submit(fetch, keyword, client_id, client_secret))
+            for keyword in keywords
+        ]
 
-    try:
-        for keyword in keywords:
-            params = {
-                "query": keyword,
-                "display": 20,
-                "start": 1,
-                "sort": "date",
-            }
-            response = requests.get(endpoint, headers=headers, params=params, timeout=10)
-            response.raise_for_status()
-            payload = response.json()
-            items = payload.get("items", [])
-
-            for item in items:
-                link = item.get("originallink") or item.get("link") or ""
-                if not link or link in existing_links:
-                    continue
+    failed_keywords = []
+    for keyword, future in futures:
+        try:
+            items = future.result()
+        except requests.RequestException:
+            failed_keywords.append(keyword)
+            continue
+
+        for item in items:
+            link = item.get("originallink") or item.get("link") or ""
+            if not link or link in existing_links:
+                continue
 
-                title = clean_html(item.get("title", "제목 없음"))
-                summary = clean_html(item.get("description", ""))
-                press_raw = clean_html(item.get("source", ""))
-                press = normalize_press_name(press_raw, link)
-                published_at = parse_naver_pub_date(item.get("pubDate", ""))
-
-                article = make_article(
-                    title=title,
-                    press=press,
-                    published_at=published_at,
-                    link=link,
-                    summary=summary,
-                    query_keyword=keyword,
-                )
-                st.session_state.inbox_articles.insert(0, article)
-                existing_links.add(link)
-                added += 1
-        return added, "api"
-    except requests.RequestException:
-        return 0, "error"
+            title = clean_html(item.get("title", "제목 없음"))
+            summary = clean_html(item.get("description", ""))
+            press_raw = clean_html(item.get("source", ""))
+            press = normalize_press_name(press_raw, link)
+            published_at = parse_naver_pub_date(item.get("pubDate", ""))
+
+            article = make_article(
+                title=title,
+                press=press,
+                published_at=published_at,
+                link=link,
+                summary=summary,
+                query_keyword=keyword,
+                collected_at=batch_now,
+            )
+            st.session_state.inbox_articles.appendleft(article)
+            existing_links.add(link)
+            added += 1
+    if added:
+        st.session_state.inbox_version += 1
+    if failed_keywords:
+        return added, "error"
+    return added, "api"
 
 
-def run_hourly_auto_collect() -> None:
+def run_hourly_auto_collect() -> bool:
     if not st.session_state.auto_collect_enabled:
-        return
+        return False
     if not naver_api_ready():
-        return
+        return False
 
-    # 앱이 열려 있는 동안 1분마다 체크하고, 1시간 경과 시 자동 수집 실행
-    st_autorefresh(interval=60 * 1000, key="hourly_auto_collect_tick")
     now = datetime.now()
     if now - st.session_state.last_auto_collect_at >= timedelta(hours=1):
         added_count, source = collect_news_from_naver()
@@ -371,10 +474,29 @@ def run_hourly_auto_collect() -> None:
         st.session_state.last_auto_collect_at = now
         if source == "api":
             st.toast(f"자동 수집 완료: {added_count}건", icon="⏱️")
+        elif source == "error" and added_count:
+            st.toast(f"자동 수집 일부 실패: {added_count}건 추가", icon="⚠️")
         elif source == "error":
             st.toast("자동 수집 실패", icon="⚠️")
+        return True
+    return False
+
+
+# 앱이 열려 있는 동안 1분마다 이 fragment만 다시 실행해 확인하고, 1시간 경과 시 자동 수집 실행
+# (전체 실행 시에는 main에서 먼저 확인하므로, 여기서 수집이 일어나는 것은 fragment 단독 실행 때뿐)
+@st.fragment(run_every=60)
+def auto_collect_tick() -> None:
+    if run_hourly_auto_collect():
+        # 수집 결과와 사이드바의 마지막 자동 수집 시각을 전체 화면에 반영
+        st.rerun()
 
 
+def _df_hash(df: pd.DataFrame) -> Tuple[Tuple, bytes]:
+    # 컬럼 구성 + 행 단위 해시로 내용이 바뀐 경우에만 엑셀을 다시 생성
+    return tuple(df.columns), pd.util.hash_pandas_object(df, index=True).values.tobytes()
+
+
+@st.cache_data(max_entries=8, show_spinner=False, hash_funcs={pd.DataFrame: _df_hash})
 def to_excel_bytes(df: pd.DataFrame, sheet_name: str) -> bytes:
     output = BytesIO()
     with pd.ExcelWriter(output, engine="openpyxl") as writer:
@@ -443,6 +565,7 @@ def draw_sidebar() -> str:
         )
 
     if st.sidebar.button("API 키 인식 상태 점검"):
+        get_naver_credentials.clear()
         cid, csec = get_naver_credentials()
         if cid and csec:
             st.sidebar.success("API 키 인식 성공")
@@ -450,17 +573,22 @@ def draw_sidebar() -> str:
             st.sidebar.error("API 키 인식 실패 (키 이름/배포 재시작 여부 확인 필요)")
 
     if st.sidebar.button("지금 뉴스 수집 실행"):
-        added_count, source = collect_news_from_naver()
+        # 수동 실행은 캐시를 거치지 않고 항상 최신 결과를 조회 (다른 세션의 캐시는 건드리지 않음)
+        added_count, source = collect_news_from_naver(use_cache=False)
         refresh_alerts()
         if source == "api":
             st.sidebar.success(f"수집 완료: 네이버 API 기사 {added_count}건 추가")
         elif source == "no_key":
             st.sidebar.warning("API 키가 없어 수집을 실행할 수 없습니다. `.env`를 확인해 주세요.")
+        elif added_count:
+            st.sidebar.warning(f"일부 키워드의 네이버 API 호출에 실패했습니다. (성공한 키워드 기사 {added_count}건 추가)")
         else:
             st.sidebar.warning("네이버 API 호출에 실패했습니다. 잠시 후 다시 시도해 주세요.")
 
     if st.sidebar.button("임시 보관함 데이터 비우기"):
-        st.session_state.inbox_articles = []
+        st.session_state.inbox_articles = deque()
+        st.session_state.inbox_link_set = set()
+        st.session_state.inbox_version += 1
         st.session_state.alerts = []
         st.sidebar.success("임시 보관함을 비웠습니다.")
 
@@ -482,8 +610,9 @@ def page_dashboard() -> None:
     st.title("메인 대시보드")
     st.caption("오늘의 뉴스 흐름과 위기 신호를 한눈에 확인하세요.")
 
-    today = datetime.now().date()
-    week_ago = datetime.now() - timedelta(days=7)
+    now = datetime.now()
+    today = now.date()
+    week_ago = now - timedelta(days=7)
 
     collected_today = sum(
         1 for a in st.session_state.inbox_articles if a["published_at"].date() == today
@@ -513,11 +642,11 @@ def page_dashboard() -> None:
 
     with right:
         st.subheader("최근 수집 기사")
-        recent = sorted(
+        recent = heapq.nlargest(
+            5,
             st.session_state.inbox_articles,
             key=lambda x: x["published_at"],
-            reverse=True,
-        )[:5]
+        )
         if not recent:
             st.info("표시할 기사가 없습니다.")
         else:
@@ -558,20 +687,18 @@ def page_inbox() -> None:
                 st.info(f"'{label}' 키워드 기사 없음")
                 continue
 
-            table_data = [
+            df = pd.DataFrame(
                 {
-                    "선택": False,
-                    "제목": a["title"],
-                    "언론사": normalize_press_name(a["press"], a["link"]),
-                    "일시": fmt_dt(a["published_at"]),
-                    "키워드": a["query_keyword"],
-                    "부정키워드": a["negative_hits"],
-                    "기사링크": a["link"],
-                    "_id": a["id"],
+                    "선택": [False] * len(filtered_articles),
+                    "제목": [a["title"] for a in filtered_articles],
+                    "언론사": [a["press"] for a in filtered_articles],
+                    "일시": [fmt_dt(a["published_at"]) for a in filtered_articles],
+                    "키워드": [a["query_keyword"] for a in filtered_articles],
+                    "부정키워드": [a["negative_hits"] for a in filtered_articles],
+                    "기사링크": [a["link"] for a in filtered_articles],
+                    "_id": [a["id"] for a in filtered_articles],
                 }
-                for a in filtered_articles
-            ]
-            df = pd.DataFrame(table_data)
+            )
             current_editor = st.data_editor(
                 df,
                 hide_index=True,
@@ -611,23 +738,23 @@ def page_inbox() -> None:
                         final_press = (
                             normalize_press_name(edited_press, article["link"])
                             if edited_press
-                            else normalize_press_name(article["press"], article["link"])
+                            else article["press"]
                         )
                         article["press"] = final_press
-                        st.session_state.saved_articles.append(
-                            {
-                                "saved_id": str(uuid.uuid4())[:8],
-                                "article_id": article["id"],
-                                "folder": target_folder,
-                                "saved_at": datetime.now(),
-                                "title": article["title"],
-                                "press": final_press,
-                                "published_at": article["published_at"],
-                                "link": article["link"],
-                                "summary": article["summary"],
-                                "negative_hits": article["negative_hits"],
-                            }
-                        )
+                        saved_article = {
+                            "saved_id": secrets.token_hex(4),
+                            "article_id": article["id"],
+                            "folder": target_folder,
+                            "saved_at": datetime.now(),
+                            "title": article["title"],
+                            "press": final_press,
+                            "published_at": article["published_at"],
+                            "link": article["link"],
+                            "summary": article["summary"],
+                            "negative_hits": article["negative_hits"],
+                        }
+                        st.session_state.saved_articles.append(saved_article)
+                        st.session_state.saved_articles_by_id[saved_article["saved_id"]] = saved_article
                         saved_count += 1
                 st.success(f"{saved_count}건을 '{target_folder}' 폴더에 저장했습니다.")
 
@@ -658,9 +785,11 @@ def page_saved_db() -> None:
                 st.warning("삭제할 폴더를 선택해 주세요.")
             else:
                 if delete_with_articles:
-                    st.session_state.saved_articles = [
-                        s for s in st.session_state.saved_articles if s["folder"] not in removable_folders
-                    ]
+                    saved_by_id = st.session_state.saved_articles_by_id
+                    removable_set = set(removable_folders)
+                    for saved_id in [sid for sid, s in saved_by_id.items() if s["folder"] in removable_set]:
+                        del saved_by_id[saved_id]
+                    st.session_state.saved_articles = list(saved_by_id.values())
                 else:
                     fallback_folder = "미분류"
                     if fallback_folder not in st.session_state.folders:
@@ -696,7 +825,7 @@ def page_saved_db() -> None:
                 "선택": False,
                 "폴더": s["folder"],
                 "기사제목": s["title"],
-                "언론사": normalize_press_name(s["press"], s["link"]),
+                "언론사": s["press"],
                 "발행일시": fmt_dt(s["published_at"]),
                 "저장일시": fmt_dt(s["saved_at"]),
                 "부정키워드": s["negative_hits"],
@@ -734,9 +863,10 @@ def page_saved_db() -> None:
         if not selected_saved_ids:
             st.warning("삭제할 스크랩 기사를 선택해 주세요.")
         else:
-            st.session_state.saved_articles = [
-                s for s in st.session_state.saved_articles if s["saved_id"] not in selected_saved_ids
-            ]
+            saved_by_id = st.session_state.saved_articles_by_id
+            for saved_id in selected_saved_ids:
+                saved_by_id.pop(saved_id, None)
+            st.session_state.saved_articles = list(saved_by_id.values())
             st.success(f"{len(selected_saved_ids)}건의 스크랩 기사를 삭제했습니다.")
 
     st.divider()
@@ -750,7 +880,7 @@ def page_saved_db() -> None:
         chosen = options[picked]
         st.session_state.correction_items.append(
             {
-                "id": str(uuid.uuid4())[:8],
+                "id": secrets.token_hex(4),
                 "article_id": chosen["article_id"],
                 "published_at": chosen["published_at"],
                 "press": chosen["press"],
@@ -821,7 +951,10 @@ def page_correction_tracking() -> None:
 def main() -> None:
     init_state()
     run_hourly_auto_collect()
-    purge_old_inbox(days=7)
+    auto_collect_tick()
+    if datetime.now() - st.session_state.last_purge_at >= timedelta(hours=1):
+        purge_old_inbox(days=7)
+        st.session_state.last_purge_at = datetime.now()
     refresh_alerts()
 
     page = draw_sidebar()